@@ -51,21 +51,28 @@ of the Python language would specify what we should all use!
 # Boilerplate.
 #-------------------------------------------------------------------------------
 
-import sys, os, platform, tempfile
+import sys, os, platform, functools, shutil, subprocess
 import cv2, numpy
-import matplotlib.pylab as plt
 
 #-------------------------------------------------------------------------------
 # MODULE INITIALIZATION.
 #-------------------------------------------------------------------------------
 
-# Set the default values of global variables.
-DEBUG = False
+# Set the default values of global variables.  The debugging state is held in
+# a one-element list so that debug_set can change it without a "global"
+# statement; assigning to a list element is a single atomic operation.
+_DEBUG = [False]
+_HAVE_GL = None     # whether display windows can use OpenGL; set by display
+_CONVOLVE = None    # the loops of convolve2d, compiled; set by convolve2d
 
 # We occasionally have to do things differently on different operating systems,
 # so figure out what we're running on.
 systype = platform.system ()
 
+# Look up where the img2sixel program is, if it is installed, so that
+# display_sixel doesn't have to search for it every time it is called.
+_IMG2SIXEL = shutil.which ("img2sixel")
+
 # Extract any settings from the environment variable "SXCV" and store them in
 # the global list ENVIRONMENT.
 key =  "SXCV"
@@ -73,10 +80,27 @@ if key in os.environ:
     val = os.environ[key].lower ()
     ENVIRONMENT = val.split ()
     # Set our globals according to keywords in the environment variable.
-    if "debug" in ENVIRONMENT: DEBUG = True
+    if "debug" in ENVIRONMENT: _DEBUG[0] = True
 else:
     ENVIRONMENT = []
 
+# Make sure OpenCV uses its optimized code, and set the number of threads it
+# uses if that was given in the environment variable.  A value that isn't a
+# whole number is reported and otherwise ignored.
+cv2.setUseOptimized (True)
+for tok in ENVIRONMENT:
+    if tok.startswith ("threads="):
+        try:
+            cv2.setNumThreads (int (tok.split ("=", 1)[1]))
+        except ValueError:
+            print ("sxcv: ignoring invalid setting '%s' in SXCV" % tok,
+                   file=sys.stderr)
+
+# Work out once whether ddisplay should output images as sixels; see the
+# comments under DEBUGGING SUPPORT for details.
+_USE_SIXEL16 = "sixel16" in ENVIRONMENT and systype != "Windows"
+_USE_SIXEL256 = "sixel256" in ENVIRONMENT and systype != "Windows"
+
 #-------------------------------------------------------------------------------
 # DEBUGGING SUPPORT.
 #-------------------------------------------------------------------------------
@@ -96,6 +120,11 @@ else:
 # sixel256: images displayed via sxsv.ddisplay will, if the system supports it,
 #    appear directly in the terminal window.
 #
+# threads=N: make OpenCV use N threads for its processing.  On some machines,
+#    OpenCV's default can make routines slower rather than faster, and
+#    "threads=1" is worth a try.  If N is not a whole number, a warning is
+#    printed and OpenCV's default is left unchanged.
+#
 # Sixel graphics are not widely reported and not all that widely used but they
 # are a really useful way of reviewing and comparing the effects of processing.
 # To be able to view them, you need to do a little preparatory work:
@@ -142,9 +171,7 @@ def debug_set (value):
     Args:
         value (bool): value to which the state should be set
     """
-    global DEBUG
-
-    DEBUG = value
+    _DEBUG[0] = bool (value)
 
 #-------------------------------------------------------------------------------
 def debugging ():
@@ -157,9 +184,7 @@ def debugging ():
     Returns:
         bool: whether debugging is enabled
     """
-    global DEBUG
-
-    return DEBUG
+    return _DEBUG[0]
 
 #-------------------------------------------------------------------------------
 def debug_off ():
@@ -199,49 +224,68 @@ def ddisplay (im, title, delay=0, destroy=True):
         destroy (bool): whether or not the window should be destroyed
                         after displaying
     """
-    global DEBUG, ENVIRONMENT
-
-    if debugging ():
-        # For information on the following tests, see the top of this file.
-        if "sixel16" in ENVIRONMENT and systype != "Windows":
-            display_sixel (im, title, 16)
-        elif "sixel256" in ENVIRONMENT and systype != "Windows":
-            display_sixel (im, title, 256)
-        else:
-            display (im, title, delay, destroy)
+    if not debugging ():
+        return
+
+    # The choice of display method was made when the module was loaded.
+    if _USE_SIXEL16:
+        display_sixel (im, title, 16, delay, destroy)
+    elif _USE_SIXEL256:
+        display_sixel (im, title, 256, delay, destroy)
+    else:
+        display (im, title, delay, destroy)
 
 #-------------------------------------------------------------------------------
-def display_sixel (im, title, levels=256):
+def display_sixel (im, title, levels=256, delay=0, destroy=True):
     """
-    Display `im` as sixels via the external program `img2sixel`.
+    Display `im` as sixels via the external program `img2sixel`.  If
+    that program is not installed, `im` is shown via `display` instead,
+    and `delay` and `destroy` are passed on to it.
 
     Args:
         im (image): image to be displayed
         title (str): information about what is being displayed
         levels (int): number of output levels to be produced
                       (default: 256)
+        delay (int): number of ms to display it for, or zero to wait for
+                     a keypress, if `display` is used (default: 0)
+        destroy (bool): whether or not the window should be destroyed
+                        after displaying, if `display` is used
     """
     # ASIDE: As well as being useful in its own right, this routine serves as
     # a template for any other routines that need to run an external program
-    # on an image.  The basic strategy is to save the image out as a temporary
-    # ".png" file (it needs to be an uncompressed format), then run a shell
-    # command on it.  In this particular case, the command does not create any
-    # output but it is easy to edit the temporary filename to have a different
-    # extension, if the external program produces an output image, and then
-    # read in the result of processing via cv2.imread as usual.
+    # on an image.  The basic strategy is to encode the image in memory in
+    # ".png" format (it needs to be a lossless format), then run the program
+    # with that data fed to its standard input.  Doing this with the
+    # subprocess module avoids writing a temporary file and starting up a
+    # shell to run the command.  In this particular case, the command does not
+    # create any output; if the external program produces an output image, it
+    # can be read from the program's standard output and decoded via
+    # cv2.imdecode.
+
+    # If img2sixel isn't installed, use a conventional display window.
+    if _IMG2SIXEL is None:
+        display (im, title, delay, destroy)
+        return
+
+    # Encode the image as PNG.  If that fails, there is nothing to pass to
+    # img2sixel, so use a conventional display window instead.
+    ok, buf = cv2.imencode (".png", im)
+    if not ok:
+        print ("Couldn't encode '%s' for sixel output!" % title,
+               file=sys.stderr)
+        display (im, title, delay, destroy)
+        return
 
     # As the sixel output goes into the terminal window, output the title
     # above it so we can find it when we scroll up the window.
     print (title + ":")
 
-    # Save the image to a temporary file, run img2sixel on it, then delete the
-    # file.
-    fn = tempfile.NamedTemporaryFile (suffix=".png").name
-    cv2.imwrite (fn, im)
-    # The following works with at least zsh.
-    cmd = "img2sixel -p %d %s 2>/dev/null" % (levels, fn)
-    os.system (cmd)
-    os.remove (fn)
+    # Pipe the PNG data through img2sixel.  We flush our own output first so
+    # that the title appears before the image.
+    sys.stdout.flush ()
+    subprocess.run ([_IMG2SIXEL, "-p", str (levels)], input=buf.tobytes (),
+                    stderr=subprocess.DEVNULL, check=False)
 
     # Terminate the line in the output in case img2sixel didn't.
     print ()
@@ -250,6 +294,22 @@ def display_sixel (im, title, levels=256):
 # SUPPORT ROUTINES.
 #-------------------------------------------------------------------------------
 
+# The arrowhead image is built only once, when the module is loaded, and
+# arrowhead() hands out copies of it.
+_ARROWHEAD = numpy.array ([
+    [0,   0,   0,   0,   0,   0,   0,   0,   0],
+    [0,   0,   0,   0, 255,   0,   0,   0,   0],
+    [0,   0,   0, 255, 255, 255,   0,   0,   0],
+    [0,   0, 255, 255, 255, 255, 255,   0,   0],
+    [0,   0,   0,   0, 255,   0,   0,   0,   0],
+    [0,   0,   0,   0, 255,   0,   0,   0,   0],
+    [0,   0,   0,   0, 255,   0,   0,   0,   0],
+    [0,   0,   0,   0, 255,   0,   0,   0,   0],
+    [0,   0,   0,   0, 255,   0,   0,   0,   0],
+    [0,   0,   0,   0,   0,   0,   0,   0,   0]
+], dtype="uint8")
+_ARROWHEAD.flags.writeable = False
+
 def arrowhead ():
     """Return the arrowhead image discussed in the software chapter
     of the lecture notes.
@@ -272,21 +332,123 @@ def arrowhead ():
         255
 
     """
-    im = numpy.array ([
-        [0,   0,   0,   0,   0,   0,   0,   0,   0],
-        [0,   0,   0,   0, 255,   0,   0,   0,   0],
-        [0,   0,   0, 255, 255, 255,   0,   0,   0],
-        [0,   0, 255, 255, 255, 255, 255,   0,   0],
-        [0,   0,   0,   0, 255,   0,   0,   0,   0],
-        [0,   0,   0,   0, 255,   0,   0,   0,   0],
-        [0,   0,   0,   0, 255,   0,   0,   0,   0],
-        [0,   0,   0,   0, 255,   0,   0,   0,   0],
-        [0,   0,   0,   0, 255,   0,   0,   0,   0],
-        [0,   0,   0,   0,   0,   0,   0,   0,   0]
-    ], dtype="uint8")
-    return im
+    return _ARROWHEAD.copy ()
+
+#-------------------------------------------------------------------------------
+def _make_convolve2d_core (prange):
+    # Return the loops of convolve2d, with the rows iterated over by `prange`.
+    # The loops are written out explicitly so that Numba can compile them;
+    # when it does, `prange` is numba.prange, which shares the rows between
+    # threads.  Otherwise, it is just range.
+    def convolve2d_core (im, mask, out):
+        ny, nx = im.shape
+        ky, kx = mask.shape
+        hy = ky // 2
+        hx = kx // 2
+        for y in prange (hy, ny - hy):
+            for x in range (hx, nx - hx):
+                s = 0
+                for j in range (0, ky):
+                    for i in range (0, kx):
+                        s += im[y+j-hy,x+i-hx] * mask[j,i]
+                out[y,x] = s
+    return convolve2d_core
+
+def convolve2d (im, mask):
+    """
+    Convolve the monochrome image `im` with `mask`, such as one returned
+    by create_mask.  Pixels closer to the edge of the image than half
+    the size of the mask are set to zero.  If both `im` and `mask` hold
+    integers, the result is of type int32; otherwise, it is of type
+    float32.  The sums themselves are formed at higher precision.  Both
+    types are understood by OpenCV, though some of its routines, such
+    as cv2.resize and cv2.cvtColor, do not accept int32 images; convert
+    the result with cv2.convertScaleAbs or `.astype ("float32")` before
+    passing it to them.  If Numba is installed, the convolution is
+    compiled to machine code and runs in parallel.
+
+    Args:
+        im (image): monochrome image to be convolved
+        mask (array): convolution mask, with an odd number of rows and
+                      columns
+
+    Returns:
+        im (image): numpy array containing the result
+
+    Raises:
+        ValueError: when invoked with a multi-channel image
+
+    Tests:
+        >>> im = convolve2d (testimage (), create_mask ("blur3"))
+        >>> im.shape
+        (13, 10)
+        >>> print (im[1:4,1:4])
+        [[ 98 103 103]
+         [ 99 108 108]
+         [103 116 116]]
+        >>> im[0,0]
+        0
+        >>> im = convolve2d (numpy.full ((5,5), 0.6), create_mask ("blur3"))
+        >>> print (round (float (im[2,2]), 2))
+        5.4
+        >>> im.dtype
+        dtype('float32')
+    """
+    global _CONVOLVE
+
+    im = numpy.asarray (im)
+    mask = numpy.asarray (mask)
+    if im.ndim != 2:
+        raise ValueError ("I can convolve only monochrome images!")
+
+    # Numba is optional and slow to load, so the first time we are called we
+    # try to import it and compile the loops with it, remembering the result.
+    # If Numba isn't available, the loops run as ordinary Python.
+    if _CONVOLVE is None:
+        try:
+            import numba
+            _CONVOLVE = numba.njit (parallel=True, fastmath=True, cache=True) \
+                (_make_convolve2d_core (numba.prange))
+        except ImportError:
+            _CONVOLVE = _make_convolve2d_core (range)
+
+    # Work in integers only if both the image and the mask are integers, so
+    # that nothing is truncated.  The sums are formed in 64 bits but stored
+    # in types that OpenCV can handle, which lacks 64-bit integer images.  A
+    # convolution flips the mask over, so we do that before passing it on.
+    if numpy.issubdtype (im.dtype, numpy.integer) and \
+       numpy.issubdtype (mask.dtype, numpy.integer):
+        dtype, out_dtype = numpy.intp, numpy.int32
+    else:
+        dtype, out_dtype = numpy.float64, numpy.float32
+    mask = numpy.ascontiguousarray (mask[::-1,::-1], dtype=dtype)
+    out = numpy.zeros (im.shape, dtype=out_dtype)
+    _CONVOLVE (numpy.ascontiguousarray (im), mask, out)
+    return out
 
 #-------------------------------------------------------------------------------
+@functools.lru_cache (maxsize=8)
+def _create_mask_cached (name):
+    # Build the mask called `name` for create_mask.  The result is cached so
+    # that each mask is built only once, and made read-only so that the
+    # cached copy cannot be altered by accident.
+    if name == "blur3":
+        im = numpy.ones ((3, 3), dtype=numpy.intp)
+
+    elif name == "blur5":
+        im = numpy.ones ((5, 5), dtype=numpy.intp)
+
+    elif name == "laplacian":
+        im = numpy.ones ((3, 3), dtype=numpy.intp)
+        im[1,1] = -1
+
+    else:
+        # We have a problem.
+        raise ValueError ("I don't know how to generate a '%s' mask!" % name)
+
+    im.flags.writeable = False
+    return im
+
 def create_mask (name):
     """
     Return one of the commonly-used convolution masks."
@@ -329,37 +491,16 @@ def create_mask (name):
     """
     # ASIDE: One of the reasons for having this routine is to show how an
     # exception in a test is handled -- the last case above does it and the
-    # exception is triggered in the trailing else case below.
-
-    if name == "blur3":
-        im = numpy.array ([
-            [1, 1, 1],
-            [1, 1, 1],
-            [1, 1, 1]
-        ], dtype="int")
-
-    elif name == "blur5":
-        im = numpy.array ([
-            [1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1]
-        ], dtype="int")
+    # exception is triggered in the trailing else case of _create_mask_cached.
 
-    elif name == "laplacian":
-        im = numpy.array ([
-            [1,  1, 1],
-            [1, -1, 1],
-            [1,  1, 1]
-        ], dtype="int")
+    # Only strings can name masks, and anything else (such as a list) can't
+    # be looked up in the cache, so reject it here.
+    if not isinstance (name, str):
+        raise ValueError ("I don't know how to generate a '%s' mask!" %
+                          (name,))
 
-    else:
-        # We have a problem.
-        raise ValueError ("I don't know how to generate a '%s' mask!" % name)
-
-    # Return the mask we have created.
-    return im
+    # Return a copy of the mask, so that the caller is free to change it.
+    return _create_mask_cached (name).copy ()
 
 #-------------------------------------------------------------------------------
 def describe (im, title="Image"):
@@ -381,8 +522,8 @@ def describe (im, title="Image"):
         >>> print (describe (im, "This image"))
         This image is monochrome of size 10 rows x 9 columns with uint8 pixels.
     """
-    text = ""
-    ns = len (im.shape)
+    im = numpy.asarray (im)
+    ns = im.ndim
     if ns == 2:
         # A two-element shape means a monochrome image.
         ny, nx = im.shape
@@ -390,14 +531,14 @@ def describe (im, title="Image"):
     elif ns == 3:
         # A three-element shape means a multi-channel image.
         ny, nx, nc = im.shape
-        channels = "has %d channels" % nc
+        channels = f"has {nc} channels"
     else:
         # We have a problem.
         raise ValueError ("I have a '%d'-dimensional image!" % ns)
 
     # Generate the actual description.
-    text += "%s %s of size %d rows x %d columns with %s pixels." % \
-        (title, channels, ny, nx, im.dtype)
+    text = f"{title} {channels} of size {ny} rows x {nx} columns with " \
+        f"{im.dtype} pixels."
 
     # Return the text.
     return text
@@ -416,8 +557,31 @@ def display (im, title=None, delay=0, destroy=True):
         destroy (bool): whether or not the window should be destroyed
                         after displaying
     """
+    global _HAVE_GL
+
     if title is None:
         title = sys.argv[0]
+
+    # If OpenCV was built with OpenGL support, create the window so that the
+    # image is drawn by the graphics card.  That works only for images with
+    # 1, 3 or 4 channels of uint8, uint16 or float32 pixels; anything else is
+    # shown in an ordinary window.  We find out whether OpenGL windows are
+    # supported the first time we are asked for one and remember the answer.
+    im = numpy.asarray (im)
+    nc = 1 if im.ndim < 3 else im.shape[2]
+    gl_ok = im.dtype in (numpy.uint8, numpy.uint16, numpy.float32) and \
+        nc in (1, 3, 4)
+    if gl_ok and _HAVE_GL is None:
+        try:
+            cv2.namedWindow (title, cv2.WINDOW_OPENGL | cv2.WINDOW_AUTOSIZE)
+            _HAVE_GL = True
+        except cv2.error as e:
+            # Any other problem, such as there being no display, is reported
+            # when we create an ordinary window below.
+            if e.code == cv2.Error.OpenGlNotSupported: _HAVE_GL = False
+    flags = cv2.WINDOW_AUTOSIZE
+    if gl_ok and _HAVE_GL: flags |= cv2.WINDOW_OPENGL
+    cv2.namedWindow (title, flags)
     cv2.imshow (title, im)
     cv2.waitKey (delay)
     if destroy:
@@ -435,8 +599,8 @@ def examine (im, aty=None, atx=None, rows=15, cols=15, title=None):
                    (default: middle of image)
         atx (int): middle column of the region to be examined
                    (default: middle of image)
-        rows (int): number of rows to be printed (default: image size)
-        cols (int):  number of columns to be printed (default: image size)
+        rows (int): number of rows to be printed (default: 15)
+        cols (int): number of columns to be printed (default: 15)
 
     Returns:
         str: the formatted output to be printed
@@ -451,10 +615,50 @@ def examine (im, aty=None, atx=None, rows=15, cols=15, title=None):
             1|    1  -1   1
             2|    1   1   1
     """
+    # The lines of output are generated by examine_iter; we just join them up.
+    return "".join (examine_iter (im, aty, atx, rows, cols, title))
+
+#-------------------------------------------------------------------------------
+@functools.lru_cache (maxsize=16)
+def _row_fmt (n):
+    # Return a format that outputs `n` values in four-character fields, for
+    # the lines of pixel values output by examine_iter.
+    return "%4d" * n
+
+def examine_iter (im, aty=None, atx=None, rows=15, cols=15, title=None):
+    """
+    Generate the lines of output of `examine` one at a time, so that
+    they can be printed as they are produced rather than all being
+    held in memory at once.  Each line ends in a newline.
+
+    Args:
+        im (image): image to be examined
+        aty (int): middle row of the region to be examined
+                   (default: middle of image)
+        atx (int): middle column of the region to be examined
+                   (default: middle of image)
+        rows (int): number of rows to be printed (default: 15)
+        cols (int): number of columns to be printed (default: 15)
+        title (str): line to be output before the region (default: none)
+
+    Yields:
+        str: the next line of the formatted output
+
+    Tests:
+        >>> for line in examine_iter (arrowhead (), 3, 4, 2, 3, "Arrow"):
+        ...     print (line, end="")
+        Arrow
+        [2 x 3 region of 10 x 9-pixel monochrome image at (3,4)]:
+                  3   4   5
+               ------------
+            2|  255 255 255
+            3|  255 255 255
+    """
     # Work out the default values of arguments.
+    im = numpy.asarray (im)
     ny = im.shape[0]
     nx = im.shape[1]
-    nc = 0 if len (im.shape) < 3 else im.shape[2]
+    nc = 0 if im.ndim < 3 else im.shape[2]
     if aty is None: aty = ny // 2
     if atx is None: atx = nx // 2
 
@@ -467,58 +671,60 @@ def examine (im, aty=None, atx=None, rows=15, cols=15, title=None):
     xhi = min (xlo + cols, nx)
     cols = xhi - xlo
 
-    # Start the output with the title and information about the region.  All
-    # our output will be appended to the variable 'text'.
-    text = ""
-    if not title is None: text += title + "\n"
+    # Start the output with the title and information about the region.
+    if not title is None: yield title + "\n"
     channels = "monochrome" if nc == 0 else "%d-channel" % nc
-    text += "[%d x %d region of %d x %d-pixel %s image at (%d,%d)]:\n" % \
+    yield "[%d x %d region of %d x %d-pixel %s image at (%d,%d)]:\n" % \
         (rows, cols, ny, nx, channels, aty, atx)
 
-    # Generate the header line and add it to text.
+    # Generate the header line and output it.  Repeating the format lets a
+    # single % operation produce the whole line.
     start = "       "
-    line = ""
-    for x in range (xlo, xhi):
-        line += "%4d" % x
-    text += start + line + "\n" + start + "-" * len (line) + "\n"
+    fmt = _row_fmt (cols)
+    header = fmt % tuple (range (xlo, xhi))
+    rule = "-" * len (header)
+    yield start + header + "\n"
+    yield start + rule + "\n"
+
+    # The second and subsequent channels of a colour pixel row are preceded
+    # by this gutter rather than the row number.
+    gutter = start[:-2] + "| "
 
     # ASIDE: A monochrome image in OpenCV has two subscripts and a colour one
     # three.  This means one cannot write a single piece of code to iterate
     # over pixels and have it work in both cases.  One can often use numpy's
     # reshape() function to make a monochrome image have three subscripts, or
-    # just use whole-array operations; but there are a few occasions where you
-    # need to iterate over subscripts explicitly.  This code shows you how.
+    # just use whole-array operations, as we do here: rather than formatting
+    # each pixel in a Python loop, a complete row is formatted in one go.
 
-    # Generate the image output.  We iterate over the rows of the image.  For
+    # Generate the image output.  We iterate over the rows of the region.  For
     # a monochrome image, we simply output the pixels along each row; but for
-    # a colour image, we produce a row for each channel.
-    for y in range (ylo, yhi):
-        text += "%5d| " % y
+    # a colour image, we produce a row for each channel.  For the latter, the
+    # region is transposed so that it is indexed as [channel,row,column] and
+    # copied so that each channel's rows are contiguous in memory.
+    sub = im[ylo:yhi, xlo:xhi]
+    if nc > 0: sub = numpy.ascontiguousarray (sub.transpose (2, 0, 1))
+    for y in range (0, rows):
+        label = "%5d| " % (ylo + y)
         if nc == 0:
-            # Monochrome so use two subscripts.
-            for x in range (xlo, xhi):
-                text += "%4d" % im[y,x]
-            text += "\n"
+            line = fmt % tuple (sub[y].tolist ())
+            yield label + line + "\n"
         else:
-            # Multi-channel so use three subscripts.
             for c in range (0, nc):
-                if c > 0: text += start[:-2] + "| "
-                for x in range (xlo, xhi):
-                    text += "%4d" % im[y,x,c]
-                text += "\n"
-
-    # Return what we have produced, ready to be printed out.
-    return text
+                line = fmt % tuple (sub[c,y].tolist ())
+                yield (gutter if c > 0 else label) + line + "\n"
 
 #-------------------------------------------------------------------------------
 def plot_histogram (x, y, title, colours=["blue", "green", "red"]):
     """
-    Plot a histogram (bar-chart) of the data in `x` and `y` using
-    Matplotlib.  The `y` array can be either a single-dimensional one
-    (for the histogram of a monochrome image) or two-dimensional for a
-    colour image, in which case the first dimension selects the colour
-    band and the second the value in that colour band.  `title` is the
-    title of the plot, shown along its top edge.
+    Plot a histogram of the data in `x` and `y` using Matplotlib.  The
+    `y` array can be either a single-dimensional one (for the histogram
+    of a monochrome image), which is plotted as a bar-chart, or
+    two-dimensional for a colour image, in which case the first
+    dimension selects the colour band and the second the value in that
+    colour band; each colour band is plotted as a translucent filled
+    outline of the bars.  `title` is the title of the plot, shown along
+    its top edge.
 
     Args:
         x (array): numpy array containing the values to plot along the
@@ -530,29 +736,61 @@ def plot_histogram (x, y, title, colours=["blue", "green", "red"]):
                                    than one plot on the axes
                                    (default: blue, green, red)
     """
+    # Matplotlib takes a long time to load, so we import it only when it is
+    # needed rather than every time this module is loaded.
+    import matplotlib.pyplot as plt
+
+    # Let the caller pass in lists as well as numpy arrays.
+    x = numpy.asarray (x)
+    y = numpy.asarray (y)
+
     # ASIDE: This routine handles monochrome and multi-channel image histogram
     # plotting in essentially the same way as examine did for images.
 
     # Set up the plot.
     plt.figure ()
     plt.grid ()
-    plt.xlim ([0, len (x)])
+    # The limits leave room for the half-width of the bars at either end.
+    if len (x) > 0: plt.xlim ([x[0] - 0.5, x[-1] + 0.5])
     plt.xlabel ("grey level")
     plt.ylabel ("frequency")
     plt.title (title)
 
-    # Plot the data.
-    if len (y.shape) == 1:
+    # Plot the data.  Each channel of a multi-channel histogram is drawn as a
+    # translucent filled step outline, so that the channels can be seen through
+    # one another.  Each is a single Matplotlib object, which is much quicker
+    # to draw than a bar-chart with a separate rectangle for every bin.
+    if y.ndim == 1:
         plt.bar (x, y, color="grey")
     else:
-        nc, np = y.shape
+        nc = y.shape[0]
         for c in range (0, nc):
-            plt.bar (x, y[c], color=colours[c])
+            plt.fill_between (x, y[c], step="mid", alpha=0.5,
+                              color=colours[c])
 
     # Show the result.
     plt.show()
 
 #-------------------------------------------------------------------------------
+# The test image is built only once, when the module is loaded, and
+# testimage() hands out copies of it.
+_TESTIMAGE = numpy.array ([
+    [10,   12,   11,   11,   12,   11,   10,   12,   11,   12],
+    [10,   10,   10,   10,   10,   10,   10,   10,   10,   11],
+    [11,   10,   14,   15,   10,   10,   10,   10,   15,   10],
+    [10,   10,   14,   15,   10,   10,   10,   10,   10,   10],
+    [10,   10,   14,   14,   10,   10,   10,   10,   10,   10],
+    [10,   10,   10,   10,   15,   13,   10,   10,   10,   12],
+    [12,   10,   10,   10,   14,   13,   10,   15,   10,   10],
+    [12,   10,   10,   10,   10,   14,   10,   14,   14,   11],
+    [12,   14,   14,   10,   10,   10,   10,   14,   10,   11],
+    [10,   13,   14,   10,   10,   10,   15,   15,   10,   12],
+    [12,   14,   15,   10,   10,   10,   10,   10,   10,   10],
+    [10,   10,   10,   10,   10,   10,   10,   10,   10,   12],
+    [11,   10,   11,   10,   12,   12,   11,   11,   10,   11],
+], dtype="uint8")
+_TESTIMAGE.flags.writeable = False
+
 def testimage ():
     """
     Return a test image whose pixels are all in the range 10 to 63.
@@ -570,22 +808,7 @@ def testimage ():
         >>> im.shape
         (13, 10)
     """
-    im = numpy.array ([
-        [10,   12,   11,   11,   12,   11,   10,   12,   11,   12],
-        [10,   10,   10,   10,   10,   10,   10,   10,   10,   11],
-        [11,   10,   14,   15,   10,   10,   10,   10,   15,   10],
-        [10,   10,   14,   15,   10,   10,   10,   10,   10,   10],
-        [10,   10,   14,   14,   10,   10,   10,   10,   10,   10],
-        [10,   10,   10,   10,   15,   13,   10,   10,   10,   12],
-        [12,   10,   10,   10,   14,   13,   10,   15,   10,   10],
-        [12,   10,   10,   10,   10,   14,   10,   14,   14,   11],
-        [12,   14,   14,   10,   10,   10,   10,   14,   10,   11],
-        [10,   13,   14,   10,   10,   10,   15,   15,   10,   12],
-        [12,   14,   15,   10,   10,   10,   10,   10,   10,   10],
-        [10,   10,   10,   10,   10,   10,   10,   10,   10,   12],
-        [11,   10,   11,   10,   12,   12,   11,   11,   10,   11],
-    ], dtype="uint8")
-    return im
+    return _TESTIMAGE.copy ()
 
 #-------------------------------------------------------------------------------
 def version ():